@@ -1,16 +1,16 @@
 import os
 import sys
 
-# Set up virtual display for headless environments
-if os.environ.get('DISPLAY') is None:
-    try:
-        import pyvirtualdisplay
-        display = pyvirtualdisplay.Display(visible=0, size=(1280, 720))
-        display.start()
-    except ImportError:
-        pass
+# Headless environments use SDL's built-in dummy video driver, which needs no
+# X server; pyvirtualdisplay is only a fallback if that driver is unavailable
+HEADLESS = (sys.platform.startswith('linux')
+            and os.environ.get('DISPLAY') is None
+            and os.environ.get('WAYLAND_DISPLAY') is None)
+if HEADLESS:
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
 
 import pygame
+import functools
 import time
 import random
 import math
@@ -25,6 +25,8 @@ from typing import List, Dict, Optional, Tuple
 WINDOW_WIDTH = 1280
 WINDOW_HEIGHT = 720
 FPS = 60
+IDLE_WAIT_MS = 1000 // FPS
+ITEM_ICON_SIZE = 60
 
 # Asset paths
 ASSET_DIR = os.path.join(os.path.dirname(__file__), '..', 'game_assets')
@@ -34,6 +36,27 @@ INVENTORY_GRID = os.path.join(GUI_DIR, 'Inventory_grid.png')
 SELECTED_ITEM = os.path.join(GUI_DIR, 'Selected_item.png')
 
 
+_virtual_display = None
+
+
+def _start_virtual_display() -> bool:
+    """Start a virtual X server with pyvirtualdisplay, if it is installed."""
+    global _virtual_display
+    try:
+        import pyvirtualdisplay
+    except ImportError:
+        return False
+    _virtual_display = pyvirtualdisplay.Display(visible=0, size=(WINDOW_WIDTH, WINDOW_HEIGHT))
+    _virtual_display.start()
+    
+    # Let SDL pick the X11 driver for the new display
+    if os.environ.get('SDL_VIDEODRIVER') == 'dummy':
+        del os.environ['SDL_VIDEODRIVER']
+    pygame.display.quit()
+    pygame.display.init()
+    return True
+
+
 # ============================================================================
 # ENUMS & DATA STRUCTURES
 # ============================================================================
@@ -43,6 +66,26 @@ class GameState(Enum):
     EXPLORATION = 3
 
 
+# Item icons keyed by path: (icon, scaled icon), or None if loading failed
+_icon_cache: Dict[str, Optional[Tuple[pygame.Surface, pygame.Surface]]] = {}
+
+
+def _load_icon(icon_path: str) -> Optional[Tuple[pygame.Surface, pygame.Surface]]:
+    """Load an item icon and its pre-scaled copy, once per path."""
+    if icon_path in _icon_cache:
+        return _icon_cache[icon_path]
+    try:
+        icon = pygame.image.load(icon_path)
+        if pygame.display.get_surface():
+            icon = icon.convert_alpha()
+        # Scale once here so drawing the inventory is a plain blit
+        icons = (icon, pygame.transform.scale(icon, (ITEM_ICON_SIZE, ITEM_ICON_SIZE)))
+    except (pygame.error, FileNotFoundError):
+        icons = None
+    _icon_cache[icon_path] = icons
+    return icons
+
+
 class Item:
     """Represents an item in the inventory."""
     def __init__(self, name: str, item_id: str, icon_path: Optional[str] = None):
@@ -50,11 +93,11 @@ class Item:
         self.item_id = item_id
         self.icon_path = icon_path
         self.icon = None
-        if icon_path and os.path.exists(icon_path):
-            try:
-                self.icon = pygame.image.load(icon_path)
-            except:
-                pass
+        self.icon_scaled = None
+        if icon_path:
+            icons = _load_icon(icon_path)
+            if icons:
+                self.icon, self.icon_scaled = icons
 
 
 class Inventory:
@@ -62,30 +105,52 @@ class Inventory:
     def __init__(self, grid_width: int = 5, grid_height: int = 3):
         self.grid_width = grid_width
         self.grid_height = grid_height
-        self.items: Dict[Tuple[int, int], Item] = {}  # (row, col) -> Item
-        self.selected_slot: Optional[Tuple[int, int]] = None
+        # Flat slot list indexed by row * grid_width + col (None = empty)
+        self.items: List[Optional[Item]] = [None] * (grid_width * grid_height)
+        self.selected_slot: Optional[int] = None
+
+    @property
+    def item_count(self) -> int:
+        """Number of occupied slots."""
+        return len(self.items) - self.items.count(None)
+
+    def slot_index(self, row: int, col: int) -> int:
+        """Return the flat index of a slot."""
+        return row * self.grid_width + col
 
     def add_item(self, item: Item, row: int, col: int) -> bool:
         """Add item to inventory at specified slot."""
         if 0 <= row < self.grid_height and 0 <= col < self.grid_width:
-            if (row, col) not in self.items:
-                self.items[(row, col)] = item
+            index = self.slot_index(row, col)
+            if self.items[index] is None:
+                self.items[index] = item
                 return True
         return False
 
     def remove_item(self, row: int, col: int) -> Optional[Item]:
         """Remove and return item from slot."""
-        return self.items.pop((row, col), None)
+        if 0 <= row < self.grid_height and 0 <= col < self.grid_width:
+            index = self.slot_index(row, col)
+            item = self.items[index]
+            self.items[index] = None
+            return item
+        return None
 
     def select_slot(self, row: int, col: int):
         """Select an inventory slot."""
         if 0 <= row < self.grid_height and 0 <= col < self.grid_width:
-            self.selected_slot = (row, col)
+            self.selected_slot = self.slot_index(row, col)
 
 
 # ============================================================================
 # INVENTORY GUI RENDERER
 # ============================================================================
+@functools.lru_cache(maxsize=32)
+def _get_default_font(size: int) -> pygame.font.Font:
+    """Return the shared default font at the given size."""
+    return pygame.font.Font(None, size)
+
+
 class InventoryGUI:
     """Handles rendering and interaction with the inventory screen."""
     
@@ -101,20 +166,20 @@ class InventoryGUI:
         
         try:
             if os.path.exists(INVENTORY_BG):
-                self.background = pygame.image.load(INVENTORY_BG)
+                self.background = pygame.image.load(INVENTORY_BG).convert_alpha()
                 self.background = pygame.transform.scale(self.background, (width, height))
         except Exception as e:
             print(f"Warning: Could not load inventory background: {e}")
         
         try:
             if os.path.exists(INVENTORY_GRID):
-                self.grid_image = pygame.image.load(INVENTORY_GRID)
+                self.grid_image = pygame.image.load(INVENTORY_GRID).convert_alpha()
         except Exception as e:
             print(f"Warning: Could not load inventory grid: {e}")
         
         try:
             if os.path.exists(SELECTED_ITEM):
-                self.selected_item_image = pygame.image.load(SELECTED_ITEM)
+                self.selected_item_image = pygame.image.load(SELECTED_ITEM).convert_alpha()
         except Exception as e:
             print(f"Warning: Could not load selected item image: {e}")
         
@@ -125,12 +190,47 @@ class InventoryGUI:
         self.grid_start_x = 100
         self.grid_start_y = 100
         
+        # Pre-scale the selection indicator and pre-render the static slot grid
+        self._selected_scaled = None
+        if self.selected_item_image:
+            # Filter when shrinking a lot; nearest-neighbour keeps pixel art crisp
+            src_width, src_height = self.selected_item_image.get_size()
+            if src_width >= 2 * self.slot_width or src_height >= 2 * self.slot_height:
+                scale = pygame.transform.smoothscale
+            else:
+                scale = pygame.transform.scale
+            self._selected_scaled = scale(
+                self.selected_item_image,
+                (self.slot_width, self.slot_height)
+            )
+        self._grid_layout = None
+        self._build_grid_layer()
+        
         # Font for item names
-        self.font_small = pygame.font.Font(None, 24)
-        self.font_large = pygame.font.Font(None, 32)
+        self.font_small = _get_default_font(24)
+        self.font_large = _get_default_font(32)
+        
+        # Rendered text surfaces keyed by (text, color, font)
+        self._text_cache: Dict[Tuple[str, Tuple[int, int, int], int], pygame.Surface] = {}
+        
+        # Inventory state as of the last draw, used to find dirty regions
+        self._drawn_items: Optional[List[Optional[Item]]] = None
+        self._drawn_selection: Optional[int] = None
+
+    def needs_redraw(self) -> bool:
+        """Return True if the inventory changed since the last draw."""
+        return (self._drawn_items is None
+                or self.inventory.selected_slot != self._drawn_selection
+                or self.inventory.items != self._drawn_items)
 
-    def draw(self, surface: pygame.Surface):
-        """Draw the inventory screen."""
+    def invalidate(self):
+        """Force the next draw to repaint the whole screen."""
+        self._drawn_items = None
+
+    def draw(self, surface: pygame.Surface) -> List[pygame.Rect]:
+        """Draw the inventory screen and return the regions that changed."""
+        dirty_rects = self._dirty_rects(surface)
+        
         # Draw background
         if self.background:
             surface.blit(self.background, (0, 0))
@@ -145,91 +245,154 @@ class InventoryGUI:
         
         # Draw UI elements
         self._draw_title(surface)
+        
+        self._drawn_items = list(self.inventory.items)
+        self._drawn_selection = self.inventory.selected_slot
+        return dirty_rects
+
+    def _dirty_rects(self, surface: pygame.Surface) -> List[pygame.Rect]:
+        """Return the screen regions that differ from the last draw."""
+        if self._drawn_items is None or self.inventory.items != self._drawn_items:
+            return [surface.get_rect()]
+        
+        dirty_rects = []
+        if self.inventory.selected_slot != self._drawn_selection:
+            for slot in (self._drawn_selection, self.inventory.selected_slot):
+                if slot is not None:
+                    dirty_rects.append(pygame.Rect(self._slot_positions[slot],
+                                                   (self.slot_width, self.slot_height)))
+            # Selected item info line
+            dirty_rects.append(pygame.Rect(0, self.screen_height - 50,
+                                           self.screen_width, 50))
+        return dirty_rects
+
+    def _build_grid_layer(self):
+        """Pre-render every unselected slot into a single surface covering the grid."""
+        rows = self.inventory.grid_height
+        cols = self.inventory.grid_width
+        selected = self.inventory.selected_slot
+        stride_x = self.slot_width + self.grid_padding
+        stride_y = self.slot_height + self.grid_padding
+        
+        # Top-left corners of each slot, indexed like Inventory.items
+        self._slot_positions = [
+            (self.grid_start_x + col * stride_x, self.grid_start_y + row * stride_y)
+            for row in range(rows)
+            for col in range(cols)
+        ]
+        
+        # Top-left corners of item icons centered in each slot
+        icon_dx = (self.slot_width - ITEM_ICON_SIZE) // 2
+        icon_dy = (self.slot_height - ITEM_ICON_SIZE) // 2
+        self._icon_xy = [(x + icon_dx, y + icon_dy) for x, y in self._slot_positions]
+        
+        layer_width = max(cols * stride_x - self.grid_padding, 0)
+        layer_height = max(rows * stride_y - self.grid_padding, 0)
+        self._grid_layer = pygame.Surface((layer_width, layer_height), pygame.SRCALPHA)
+        for index, (x, y) in enumerate(self._slot_positions):
+            if index == selected:
+                continue
+            slot_rect = pygame.Rect(x - self.grid_start_x, y - self.grid_start_y,
+                                    self.slot_width, self.slot_height)
+            pygame.draw.rect(self._grid_layer, (100, 100, 100), slot_rect, 2)
+            pygame.draw.rect(self._grid_layer, (50, 50, 50), slot_rect)
+        
+        self._grid_layout = (rows, cols, selected)
 
     def _draw_grid(self, surface: pygame.Surface):
         """Draw the inventory grid."""
-        for row in range(self.inventory.grid_height):
-            for col in range(self.inventory.grid_width):
-                x = self.grid_start_x + col * (self.slot_width + self.grid_padding)
-                y = self.grid_start_y + row * (self.slot_height + self.grid_padding)
-                
-                # Draw slot background
-                slot_rect = pygame.Rect(x, y, self.slot_width, self.slot_height)
-                
-                # Highlight selected slot
-                if self.inventory.selected_slot == (row, col):
-                    if self.selected_item_image:
-                        # Scale selection indicator to fit slot
-                        scaled_selection = pygame.transform.scale(
-                            self.selected_item_image,
-                            (self.slot_width, self.slot_height)
-                        )
-                        surface.blit(scaled_selection, slot_rect)
-                    else:
-                        pygame.draw.rect(surface, (255, 200, 0), slot_rect, 3)
-                else:
-                    pygame.draw.rect(surface, (100, 100, 100), slot_rect, 2)
-                    pygame.draw.rect(surface, (50, 50, 50), slot_rect)
+        # Rebuild the cached layer only when the grid or selection changed
+        layout = (self.inventory.grid_height, self.inventory.grid_width,
+                  self.inventory.selected_slot)
+        if self._grid_layout != layout:
+            self._build_grid_layer()
+        
+        surface.blit(self._grid_layer, (self.grid_start_x, self.grid_start_y))
+        
+        # Highlight selected slot
+        if self.inventory.selected_slot is not None:
+            slot_rect = pygame.Rect(self._slot_positions[self.inventory.selected_slot],
+                                    (self.slot_width, self.slot_height))
+            if self._selected_scaled:
+                surface.blit(self._selected_scaled, slot_rect)
+            else:
+                pygame.draw.rect(surface, (255, 200, 0), slot_rect, 3)
 
     def _draw_items(self, surface: pygame.Surface):
         """Draw items in their inventory slots."""
-        for (row, col), item in self.inventory.items.items():
-            x = self.grid_start_x + col * (self.slot_width + self.grid_padding)
-            y = self.grid_start_y + row * (self.slot_height + self.grid_padding)
-            
-            # Draw item icon if available
-            if item.icon:
-                # Scale icon to fit slot with padding
-                icon_scaled = pygame.transform.scale(item.icon, (60, 60))
-                icon_rect = icon_scaled.get_rect(center=(
-                    x + self.slot_width // 2,
-                    y + self.slot_height // 2
-                ))
-                surface.blit(icon_scaled, icon_rect)
+        icons = []
+        for index, item in enumerate(self.inventory.items):
+            if item is None:
+                continue
+            # Queue item icon if available
+            if item.icon_scaled:
+                icons.append((item.icon_scaled, self._icon_xy[index]))
             else:
                 # Draw placeholder
-                label = self.font_small.render(item.name[:3], True, (200, 200, 200))
+                x, y = self._slot_positions[index]
+                label = self._text(item.name[:3], (200, 200, 200), self.font_small)
                 label_rect = label.get_rect(center=(
                     x + self.slot_width // 2,
                     y + self.slot_height // 2
                 ))
                 surface.blit(label, label_rect)
+        
+        # Blit every icon in a single call
+        surface.blits(icons, doreturn=0)
 
     def _draw_title(self, surface: pygame.Surface):
         """Draw the title and info."""
-        title = self.font_large.render("INVENTORY", True, (255, 255, 255))
+        title = self._text("INVENTORY", (255, 255, 255), self.font_large)
         surface.blit(title, (self.grid_start_x, 40))
         
         # Item count
-        item_count = len(self.inventory.items)
+        item_count = self.inventory.item_count
         max_slots = self.inventory.grid_width * self.inventory.grid_height
-        count_text = self.font_small.render(
+        count_text = self._text(
             f"Items: {item_count}/{max_slots}",
-            True,
-            (200, 200, 200)
+            (200, 200, 200),
+            self.font_small
         )
         surface.blit(count_text, (self.grid_start_x, 70))
         
         # Selected item info
-        if self.inventory.selected_slot and self.inventory.selected_slot in self.inventory.items:
-            item = self.inventory.items[self.inventory.selected_slot]
-            info_text = self.font_small.render(f"Selected: {item.name}", True, (100, 200, 255))
+        selected = self.inventory.selected_slot
+        item = self.inventory.items[selected] if selected is not None else None
+        if item is not None:
+            info_text = self._text(f"Selected: {item.name}", (100, 200, 255), self.font_small)
             surface.blit(info_text, (self.grid_start_x, self.screen_height - 50))
 
+    def _text(self, text: str, color: Tuple[int, int, int],
+              font: pygame.font.Font) -> pygame.Surface:
+        """Render text once and reuse the surface on later frames."""
+        key = (text, color, id(font))
+        label = self._text_cache.get(key)
+        if label is None:
+            label = font.render(text, True, color).convert_alpha()
+            self._text_cache[key] = label
+        return label
+
     def handle_click(self, pos: Tuple[int, int]):
         """Handle mouse click on inventory."""
         x, y = pos
         
-        # Check which slot was clicked
-        for row in range(self.inventory.grid_height):
-            for col in range(self.inventory.grid_width):
-                slot_x = self.grid_start_x + col * (self.slot_width + self.grid_padding)
-                slot_y = self.grid_start_y + row * (self.slot_height + self.grid_padding)
-                slot_rect = pygame.Rect(slot_x, slot_y, self.slot_width, self.slot_height)
-                
-                if slot_rect.collidepoint(x, y):
-                    self.inventory.select_slot(row, col)
-                    return
+        # Slots form a regular grid, so the clicked slot follows from the offset
+        dx = x - self.grid_start_x
+        dy = y - self.grid_start_y
+        if dx < 0 or dy < 0:
+            return
+        
+        stride_x = self.slot_width + self.grid_padding
+        stride_y = self.slot_height + self.grid_padding
+        col, offset_x = divmod(dx, stride_x)
+        row, offset_y = divmod(dy, stride_y)
+        
+        # Ignore clicks landing in the padding between slots
+        if offset_x >= self.slot_width or offset_y >= self.slot_height:
+            return
+        
+        if row < self.inventory.grid_height and col < self.inventory.grid_width:
+            self.inventory.select_slot(row, col)
 
 
 # ============================================================================
@@ -240,7 +403,12 @@ class Game:
     
     def __init__(self):
         pygame.init()
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        try:
+            self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        except pygame.error:
+            if not (HEADLESS and _start_virtual_display()):
+                raise
+            self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Voidfallen")
         self.clock = pygame.time.Clock()
         self.running = True
@@ -275,12 +443,22 @@ class Game:
 
     def handle_events(self):
         """Handle input events."""
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if not events and not self.needs_redraw():
+            # Nothing to animate: sleep until input arrives instead of spinning
+            event = pygame.event.wait(IDLE_WAIT_MS)
+            if event.type != pygame.NOEVENT:
+                events.append(event)
+                events.extend(pygame.event.get())
+        
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.running = False
+            elif event.type == pygame.WINDOWEXPOSED:
+                self.inventory_gui.invalidate()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left click
                     if self.state == GameState.INVENTORY:
@@ -290,22 +468,32 @@ class Game:
         """Update game logic."""
         pass
 
+    def needs_redraw(self) -> bool:
+        """Return True if the current state has something new to show."""
+        if self.state == GameState.INVENTORY:
+            return self.inventory_gui.needs_redraw()
+        return False
+
     def draw(self):
         """Render the current state."""
         if self.state == GameState.INVENTORY:
-            self.inventory_gui.draw(self.screen)
-        
-        pygame.display.flip()
+            # Only present the regions that actually changed
+            dirty_rects = self.inventory_gui.draw(self.screen)
+            pygame.display.update(dirty_rects)
 
     def run(self):
         """Main game loop."""
         while self.running:
             self.handle_events()
             self.update()
-            self.draw()
-            self.clock.tick(FPS)
+            # Static frames are skipped entirely; handle_events already waited
+            if self.needs_redraw():
+                self.draw()
+                self.clock.tick(FPS)
         
         pygame.quit()
+        # Cached fonts are invalid once pygame shuts down
+        _get_default_font.cache_clear()
 
 
 # ============================================================================
@@ -4,23 +4,66 @@ Generate dialogue PNGs by composing character PNGs from the `custom_font` folder
 Usage:
   python3 scripts/generate_dialogue.py "Hello, World!" --output dialogue/hello.png
 
-Requires: Pillow (pip install pillow)
+Requires: Pillow and NumPy (pip install pillow numpy)
+Optional: Numba (pip install numba) speeds up long lines in variable-height fonts
 """
 import os
+import re
 import sys
 import argparse
+from types import MappingProxyType
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate, repeat
+import numpy as np
 from PIL import Image
+from PIL.PngImagePlugin import PngImageFile
 from datetime import datetime
 
 
+# Decoded RGBA glyph arrays keyed by absolute path (None if unreadable)
+_glyph_cache = {}
+
+# Stand-in glyph filename for a space that has no glyph file of its own
+_SPACE = ' '
+
+# Marks characters missing from a resolution table in _resolve_glyphs
+_UNSEEN = object()
+
+# '#RRGGBB' background colours accepted by parse_color
+_HEX_RE = re.compile(r'#([0-9a-fA-F]{6})$')
+
+# generate_image keyword arguments for --batch worker processes
+_worker_options = {}
+
+# Lines shorter than this aren't worth a call into the Numba blit kernel
+_JIT_MIN_GLYPHS = 200
+
+# _blit_atlas before Numba has been looked for, see _load_blit_kernel
+_NOT_LOADED = object()
+
+# Compiled Numba blit kernel, or None when Numba isn't installed
+_blit_atlas = _NOT_LOADED
+
+# Backing memory for generate_image(reuse_buffer=True), see _scratch_canvas
+_scratch = np.empty(0, dtype=np.uint8)
+
+# id(mapping) -> (mapping, character resolution table), see _resolution_table
+_resolution_tables = {}
+
+
+# The result is shared between callers, so it is handed out read-only.
+@lru_cache(maxsize=8)
 def build_mapping(font_dir):
     mapping = {}
     if not os.path.isdir(font_dir):
-        return mapping
-    for fname in os.listdir(font_dir):
-        if not fname.lower().endswith('.png'):
-            continue
-        stem = os.path.splitext(fname)[0]
+        return MappingProxyType(mapping)
+    with os.scandir(font_dir) as entries:
+        fnames = [e.name for e in entries
+                  if e.name[-4:].lower() == '.png' and e.is_file()]
+    for fname in fnames:
+        # a bare ".png" keeps its whole name as the stem, as splitext would
+        stem = fname[:-4] or fname
         # Upper_/Lower_ tokens
         if stem.startswith('Upper_') and len(stem) > len('Upper_'):
             ch = stem[len('Upper_'):]
@@ -56,77 +99,295 @@ def build_mapping(font_dir):
             continue
         # fallback: map full stem to itself so users can name custom symbols
         mapping[stem] = fname
-    return mapping
+    return MappingProxyType(mapping)
 
 
-def compose_line(images, space_width=10, bg=(0,0,0,0)):
-    widths = [img.width for img in images]
-    heights = [img.height for img in images]
+def compose_line(glyphs, space_width=10, bg=(0,0,0,0)):
+    """Lay out RGBA glyph arrays left to right, bottom-aligned, into one Image."""
+    heights = [g.shape[0] for g in glyphs]
+    widths = [g.shape[1] for g in glyphs]
     total_w = sum(widths)
-    max_h = max(heights) if heights else 0
-    out = Image.new('RGBA', (total_w, max_h), bg)
-    x = 0
-    for img in images:
-        y = max_h - img.height
-        out.paste(img, (x, y), img)
-        x += img.width
-    return out
+    max_h = max(heights, default=0)
+    # glyphs never overlap, so copying them into a transparent buffer is enough
+    out = _concat_line(glyphs, heights, max_h) if glyphs else None
+    if out is None:
+        out = np.zeros((max_h, total_w, 4), dtype=np.uint8)
+        for g, h, w, x in zip(glyphs, heights, widths, _x_offsets(widths)):
+            out[max_h - h:max_h, x:x + w] = g
+    # fromarray only wraps C-contiguous buffers without copying them first
+    assert out.flags['C_CONTIGUOUS']
+    return _over_background(Image.fromarray(out), bg)
 
 
-def _load_glyph_widths(mapping, font_dir, space_width=6):
-    """Return dict char -> width (in pixels). Unknown chars are treated as space_width."""
-    widths = {}
-    for ch, fname in mapping.items():
-        if ch == ' ':
-            widths[ch] = space_width
+@lru_cache(maxsize=32)
+def _blank(h, w):
+    """Return a shared, read-only fully transparent (h, w) RGBA array."""
+    blank = np.zeros((h, w, 4), dtype=np.uint8)
+    blank.flags.writeable = False
+    return blank
+
+
+def _concat_line(glyphs, heights, line_h):
+    """Join a line's glyph arrays with a single np.concatenate, or return None.
+
+    This works when every glyph is line_h tall, as in a fixed-height bitmap
+    font. Shorter glyphs that are fully transparent (spaces) are swapped for
+    full-height blanks; any other short glyph needs bottom alignment instead.
+    """
+    if heights.count(line_h) != len(heights):
+        glyphs = list(glyphs)
+        for i, h in enumerate(heights):
+            if h != line_h:
+                if glyphs[i].any():
+                    return None
+                glyphs[i] = _blank(line_h, glyphs[i].shape[1])
+    return np.concatenate(glyphs, axis=1)
+
+
+def _x_offsets(widths, x0=0):
+    """Return the left edge of each glyph when widths are laid out from x0."""
+    return list(accumulate(widths[:-1], initial=x0))
+
+
+def _over_background(img, bg):
+    """Composite a transparent-background RGBA image over bg in one pass."""
+    if bg is None or bg[3] == 0:
+        return img
+    return Image.alpha_composite(Image.new('RGBA', img.size, bg), img)
+
+
+def _load_glyph(img_path):
+    """Return the glyph at img_path as an RGBA uint8 array, or None if it can't be read.
+
+    Each file is decoded once per process; later calls return the cached image.
+    """
+    key = os.path.abspath(img_path)
+    try:
+        return _glyph_cache[key]
+    except KeyError:
+        pass
+    try:
+        # glyphs are always PNG; opening them directly skips plugin discovery
+        with PngImageFile(key) as im:
+            # C order lets every later slice copy run as a plain memcpy
+            glyph = np.ascontiguousarray(np.asarray(im.convert('RGBA')))
+    except Exception:
+        glyph = None
+    _glyph_cache[key] = glyph
+    return glyph
+
+
+@lru_cache(maxsize=8)
+def _load_font(font_dir):
+    """Return dict glyph filename -> (RGBA array, height, width) for font_dir.
+
+    All mapped glyphs are decoded and measured up front, so rendering and line
+    measurement are pure dict lookups. Unreadable files are left out.
+    """
+    glyphs = {}
+    for fname in set(build_mapping(font_dir).values()):
+        glyph = _load_glyph(os.path.join(font_dir, fname))
+        if glyph is not None:
+            glyphs[fname] = (glyph, glyph.shape[0], glyph.shape[1])
+    return glyphs
+
+
+@lru_cache(maxsize=8)
+def _font_atlas(font_dir):
+    """Pack every glyph of font_dir into one array for the Numba blit kernel.
+
+    Returns (index, atlas, shapes): index maps glyph filename -> row of atlas
+    (and _SPACE -> -1), atlas[i] holds glyph i zero-padded to the largest
+    glyph, and shapes[i] is its (height, width).
+    """
+    font = _load_font(font_dir)
+    fnames = list(font)
+    shapes = np.array([font[f][1:] for f in fnames], dtype=np.intp).reshape(-1, 2)
+    max_h, max_w = shapes.max(axis=0).tolist() if len(shapes) else (0, 0)
+    atlas = np.zeros((len(fnames), max_h, max_w, 4), dtype=np.uint8)
+    for i, (fname, (h, w)) in enumerate(zip(fnames, shapes.tolist())):
+        atlas[i, :h, :w] = font[fname][0]
+    index = {fname: i for i, fname in enumerate(fnames)}
+    index[_SPACE] = -1
+    return index, atlas, shapes
+
+
+def _blit_atlas_kernel(canvas, atlas, shapes, idx, xs, y_bottom):
+    # compiled with Numba by _load_blit_kernel; not called as plain Python
+    for k in range(idx.size):
+        i = idx[k]
+        if i < 0:
+            # space: the canvas is already transparent there
             continue
-        img_path = os.path.join(font_dir, fname)
+        h = shapes[i, 0]
+        w = shapes[i, 1]
+        canvas[y_bottom - h:y_bottom, xs[k]:xs[k] + w] = atlas[i, :h, :w]
+
+
+def _load_blit_kernel():
+    """Return the compiled blit kernel, or None if Numba isn't installed.
+
+    Numba is imported on first use only, so ordinary runs never pay for it,
+    and the outcome is kept so the import is attempted once per process.
+    """
+    global _blit_atlas
+    if _blit_atlas is _NOT_LOADED:
         try:
-            with Image.open(img_path) as im:
-                widths[ch] = im.width
-        except Exception:
-            widths[ch] = space_width
+            from numba import njit
+        except ImportError:  # optional; plain NumPy slice copies are used instead
+            _blit_atlas = None
+        else:
+            _blit_atlas = njit(cache=True)(_blit_atlas_kernel)
+    return _blit_atlas
+
+
+def _jit_blit_line(canvas, fnames, font_dir, widths, x0, y_bottom):
+    """Draw a bottom-aligned line of glyphs with the Numba kernel.
+
+    Only used for long lines of fonts whose glyph heights differ. Returns
+    False without drawing when Numba is missing, the line is short, or it uses
+    glyphs outside font_dir's atlas.
+    """
+    if len(widths) < _JIT_MIN_GLYPHS:
+        return False
+    blit = _load_blit_kernel()
+    if blit is None:
+        return False
+    index, atlas, atlas_shapes = _font_atlas(font_dir)
+    idx = [index.get(f) for f in fnames if f is not None]
+    if None in idx:
+        return False
+    blit(canvas, atlas, atlas_shapes, np.array(idx, dtype=np.intp),
+         np.array(_x_offsets(widths, x0), dtype=np.intp), y_bottom)
+    return True
+
+
+def _load_glyph_widths(mapping, font_dir, space_width=6):
+    """Return dict glyph filename -> width (in pixels), plus _SPACE -> space_width.
+
+    Glyphs that can't be read are left out so callers pick their own fallback.
+    """
+    return _cached_glyph_widths(frozenset(mapping.values()), font_dir, space_width)
+
+
+@lru_cache(maxsize=8)
+def _cached_glyph_widths(fnames, font_dir, space_width):
+    widths = {_SPACE: space_width}
+    for fname in fnames:
+        glyph = _load_glyph(os.path.join(font_dir, fname))
+        if glyph is not None:
+            widths[fname] = glyph.shape[1]
     return widths
 
 
+def _resolution_table(mapping):
+    """Return the dict character -> glyph filename used by _resolve_glyphs.
+
+    It starts from mapping plus the uppercase form of every lowercase key, and
+    characters outside it are resolved once through the full fallback chain and
+    added, so each character costs a single lookup afterwards.
+    """
+    entry = _resolution_tables.get(id(mapping))
+    if entry is not None and entry[0] is mapping:
+        return entry[1]
+    table = dict(mapping)
+    for key, fname in mapping.items():
+        upper = key.upper()
+        # only where the lowercase fallback would land back on key
+        if upper.lower() == key:
+            table.setdefault(upper, fname)
+    if len(_resolution_tables) >= 8:
+        _resolution_tables.clear()
+    # keep mapping alive alongside its table so its id can't be reused
+    _resolution_tables[id(mapping)] = (mapping, table)
+    return table
+
+
+def _resolve_char(ch, mapping):
+    """Resolve one character through the direct, lowercase and space fallbacks."""
+    fname = mapping.get(ch)
+    if fname is None:
+        fname = mapping.get(ch.lower())
+    if fname is None and ch == ' ':
+        fname = _SPACE
+    return fname
+
+
+def _resolve_glyphs(s, mapping):
+    """Return the glyph filename for each character of s.
+
+    Double quotes alternate between the left/right variants when available.
+    Spaces without a glyph of their own resolve to _SPACE, other unknown
+    characters to None.
+    """
+    table = _resolution_table(mapping)
+    # one pass in C; characters the table hasn't seen yet come back as _UNSEEN
+    fnames = list(map(table.get, s, repeat(_UNSEEN)))
+    if _UNSEEN in fnames:
+        for i, fname in enumerate(fnames):
+            if fname is _UNSEEN:
+                fnames[i] = table[s[i]] = _resolve_char(s[i], mapping)
+    # If double-quote, prefer left/right token variants when available
+    if '__token__Left_quote' in mapping or '__token__Right_quote' in mapping:
+        quote_fnames = (mapping.get('__token__Left_quote'), mapping.get('__token__Right_quote'))
+        quote_open = False
+        i = s.find('"')
+        while i != -1:
+            fname = quote_fnames[quote_open]
+            if fname is not None:
+                fnames[i] = fname
+            quote_open = not quote_open
+            i = s.find('"', i + 1)
+    return fnames
+
+
 def wrap_text_to_lines(text, mapping, font_dir, max_width, space_width=12):
     """Wrap the given text into lines such that each line's pixel width <= max_width.
 
     Prefers to break at spaces (words); if a single word exceeds max_width it is
     broken at the character where it overflows.
+
+    Returns (lines, line_glyphs) where line_glyphs[i] holds the resolved glyph
+    filenames of lines[i], ready to pass to compose_glyphs.
     """
-    # Precompute glyph widths
+    # Precompute glyph widths; unknown chars are treated as space_width
     glyph_widths = _load_glyph_widths(mapping, font_dir, space_width)
 
     paragraphs = text.split('\n')
     out_lines = []
+    out_glyphs = []
     for para in paragraphs:
         if not para:
             out_lines.append('')
+            out_glyphs.append([])
             continue
+        # resolve the whole paragraph once so quote pairs match across lines
+        para_glyphs = _resolve_glyphs(para, mapping)
+        # cumulative widths: chars i..j span cum_w[j] - cum_w[i] pixels
+        char_w = np.fromiter((glyph_widths.get(g, space_width) for g in para_glyphs),
+                             dtype=np.int64, count=len(para_glyphs))
+        cum_w = np.concatenate(([0], np.cumsum(char_w)))
         words = para.split(' ')
         cur_line = ''
+        cur_glyphs = []
         cur_width = 0
         first_word = True
-        quote_open = False
+        word_start = 0
         for word in words:
+            start, end = word_start, word_start + len(word)
+            word_start = end + 1
+            word_glyphs = para_glyphs[start:end]
+            # glyph of the space preceding this word (unused for the first one)
+            sep_glyphs = para_glyphs[start - 1:start] if start else []
             # compute word width (characters)
-            w = 0
-            for ch in word:
-                # handle double-quote opening/closing selection if tokens exist
-                if ch == '"' and ('__token__Left_quote' in mapping or '__token__Right_quote' in mapping):
-                    token_key = '__token__Left_quote' if not quote_open else '__token__Right_quote'
-                    ch_w = glyph_widths.get(token_key, glyph_widths.get('"', space_width))
-                    quote_open = not quote_open
-                else:
-                    ch_w = glyph_widths.get(ch, glyph_widths.get(ch.lower(), space_width))
-                w += ch_w
+            w = int(cum_w[end] - cum_w[start])
             # include a space before word if not first
             space_w = 0 if first_word else space_width
             if first_word:
                 # place word (may need to break if too long)
                 if w <= max_width:
                     cur_line = word
+                    cur_glyphs = word_glyphs
                     cur_width = w
                     first_word = False
                     continue
@@ -135,7 +396,9 @@ def wrap_text_to_lines(text, mapping, font_dir, max_width, space_width=12):
             if cur_width + space_w + w <= max_width:
                 if not first_word:
                     cur_line += ' '
+                    cur_glyphs = cur_glyphs + sep_glyphs
                 cur_line += word
+                cur_glyphs = cur_glyphs + word_glyphs
                 cur_width += space_w + w
                 first_word = False
             else:
@@ -144,164 +407,261 @@ def wrap_text_to_lines(text, mapping, font_dir, max_width, space_width=12):
                     # flush current line if any
                     if cur_line:
                         out_lines.append(cur_line)
+                        out_glyphs.append(cur_glyphs)
                         cur_line = ''
+                        cur_glyphs = []
                         cur_width = 0
                         first_word = True
-                    # break word by chars
-                    chunk = ''
-                    chunk_w = 0
-                    for ch in word:
-                        if ch == '"' and ('__token__Left_quote' in mapping or '__token__Right_quote' in mapping):
-                            token_key = '__token__Left_quote' if not quote_open else '__token__Right_quote'
-                            ch_w = glyph_widths.get(token_key, glyph_widths.get('"', space_width))
-                            quote_open = not quote_open
-                        else:
-                            ch_w = glyph_widths.get(ch, glyph_widths.get(ch.lower(), space_width))
-                        if chunk_w + ch_w <= max_width:
-                            chunk += ch
-                            chunk_w += ch_w
-                        else:
-                            if chunk:
-                                out_lines.append(chunk)
-                            chunk = ch
-                            chunk_w = ch_w
-                    if chunk:
-                        cur_line = chunk
-                        cur_width = chunk_w
-                        first_word = False
+                    # break word by chars: each chunk is the longest run that
+                    # fits, but always at least one char
+                    i = start
+                    while True:
+                        j = int(np.searchsorted(cum_w, cum_w[i] + max_width, side='right')) - 1
+                        j = min(max(j, i + 1), end)
+                        if j == end:
+                            break
+                        out_lines.append(para[i:j])
+                        out_glyphs.append(para_glyphs[i:j])
+                        i = j
+                    cur_line = para[i:end]
+                    cur_glyphs = para_glyphs[i:end]
+                    cur_width = int(cum_w[end] - cum_w[i])
+                    first_word = False
                 else:
                     # flush current line and start with this word
                     if cur_line:
                         out_lines.append(cur_line)
+                        out_glyphs.append(cur_glyphs)
                     cur_line = word
+                    cur_glyphs = word_glyphs
                     cur_width = w
                     first_word = False
         if cur_line:
             out_lines.append(cur_line)
-    return out_lines
+            out_glyphs.append(cur_glyphs)
+    return out_lines, out_glyphs
 
 
-def compose_string_to_image(s, mapping, font_dir, space_width=12):
-    """Compose a single string (no newline) into an Image using glyph files."""
-    imgs = []
-    quote_open = False
-    for ch in s:
-        # If double-quote, prefer left/right token variants when available
-        fname = None
-        if ch == '"' and ('__token__Left_quote' in mapping or '__token__Right_quote' in mapping):
-            token_key = '__token__Left_quote' if not quote_open else '__token__Right_quote'
-            fname = mapping.get(token_key)
-            quote_open = not quote_open
-        if fname is None:
-            fname = mapping.get(ch)
-        if fname is None:
-            fname = mapping.get(ch.lower())
-        if fname is None:
-            if ch == ' ':
-                imgs.append(Image.new('RGBA', (space_width, 1), (0,0,0,0)))
-                continue
-            fname = mapping.get('.') if ch == '.' else None
+def _fast_path(text, mapping, font_dir, max_width, space_width=12):
+    """Return the resolved glyphs of text if it fits on one line, else None.
+
+    Short single-line dialogue is the common case and needs no word wrapping.
+    Widths are measured the same way wrap_text_to_lines measures them.
+    """
+    if '\n' in text:
+        return None
+    glyphs = _resolve_glyphs(text, mapping)
+    glyph_widths = _load_glyph_widths(mapping, font_dir, space_width)
+    total = sum(space_width if ch == ' ' else glyph_widths.get(g, space_width)
+                for ch, g in zip(text, glyphs))
+    if total > max_width:
+        return None
+    return glyphs
+
+
+def _glyph_arrays(fnames, font_dir, space_width=12):
+    """Return (arrays, heights, widths) to draw for resolved glyph filenames.
+
+    Sizes come from the font cache, so measuring a line touches no arrays.
+    """
+    font = _load_font(font_dir)
+    # every space on every line shares one blank array
+    space = (_blank(1, space_width), 1, space_width)
+    entries = []
+    for fname in fnames:
         if fname is None:
             continue
-        img_path = os.path.join(font_dir, fname)
-        try:
-            img = Image.open(img_path).convert('RGBA')
-        except Exception:
+        if fname == _SPACE:
+            entries.append(space)
             continue
-        imgs.append(img)
-    if not imgs:
+        entry = font.get(fname)
+        if entry is None:
+            # not part of font_dir's own mapping (e.g. a custom mapping)
+            glyph = _load_glyph(os.path.join(font_dir, fname))
+            if glyph is None:
+                continue
+            entry = (glyph, glyph.shape[0], glyph.shape[1])
+        entries.append(entry)
+    if not entries:
+        return [], [], []
+    arrays, heights, widths = zip(*entries)
+    return list(arrays), list(heights), list(widths)
+
+
+def _line_size(heights, widths, space_width=12):
+    """Return the (width, height) compose_line would produce for glyphs of these sizes."""
+    if not widths:
+        # matches the blank image compose_glyphs returns for an empty line
+        return space_width, 1
+    return sum(widths), max(heights)
+
+
+def compose_glyphs(fnames, font_dir, space_width=12):
+    """Compose resolved glyph filenames (see _resolve_glyphs) into an Image."""
+    glyphs = _glyph_arrays(fnames, font_dir, space_width)[0]
+    if not glyphs:
         return Image.new('RGBA', (space_width, 1), (0,0,0,0))
-    return compose_line(imgs, space_width)
+    return compose_line(glyphs, space_width)
+
+
+def compose_string_to_image(s, mapping, font_dir, space_width=12):
+    """Compose a single string (no newline) into an Image using glyph files."""
+    return compose_glyphs(_resolve_glyphs(s, mapping), font_dir, space_width)
+
+
+def _prefix_widths(fnames, glyph_widths):
+    """Return widths w where w[i] is the composed pixel width of fnames[:i]."""
+    return [0] + list(accumulate(glyph_widths.get(g, 0) for g in fnames))
 
 
 def parse_color(s):
     if s is None:
         return None
     s = s.strip()
-    if s.startswith('#') and len(s) == 7:
-        r = int(s[1:3], 16)
-        g = int(s[3:5], 16)
-        b = int(s[5:7], 16)
-        return (r, g, b, 255)
+    m = _HEX_RE.match(s)
+    if m:
+        v = int(m.group(1), 16)
+        return (v >> 16 & 0xff, v >> 8 & 0xff, v & 0xff, 255)
     parts = [p.strip() for p in s.split(',') if p.strip()]
     if len(parts) == 3:
         return (int(parts[0]), int(parts[1]), int(parts[2]), 255)
     return None
 
 
-def generate_image(text, font_dir, out_path, space_width=12, line_spacing=8, bg_color=None, box_width=None, box_height=None):
+def generate_image(text, font_dir, out_path, space_width=12, line_spacing=8, bg_color=None, box_width=None, box_height=None, compress_level=1, reuse_buffer=False):
     mapping = build_mapping(font_dir)
     # Wrap to box_width if provided, otherwise respect explicit newlines
     if box_width:
-        lines = wrap_text_to_lines(text, mapping, font_dir, box_width, space_width)
+        glyphs = _fast_path(text, mapping, font_dir, box_width, space_width)
+        if glyphs is not None:
+            lines, line_glyphs = [text], [glyphs]
+        else:
+            lines, line_glyphs = wrap_text_to_lines(text, mapping, font_dir, box_width, space_width)
     else:
         lines = text.split('\n')
+        line_glyphs = [_resolve_glyphs(line, mapping) for line in lines]
 
-    # Compose each line into an image and keep strings for trimming
-    line_images = []
-    line_strings = []
-    for line in lines:
-        img = compose_string_to_image(line, mapping, font_dir, space_width)
-        line_images.append(img)
-        line_strings.append(line)
+    # Measure each line from its glyphs' cached sizes; nothing is composed yet.
+    # line_layouts keeps (arrays, heights, widths) so drawing reuses them.
+    line_layouts = [_glyph_arrays(glyphs, font_dir, space_width) for glyphs in line_glyphs]
+    line_sizes = [_line_size(heights, widths, space_width) for _, heights, widths in line_layouts]
 
     # If a box_height is specified, trim lines and add ellipsis if needed
-    if box_height is not None and line_images:
-        widths = [li.width for li in line_images]
-        heights = [li.height for li in line_images]
+    if box_height is not None and line_sizes:
+        heights = [h for _, h in line_sizes]
         total_h = sum(heights) + line_spacing * (len(heights)-1 if len(heights)>0 else 0)
         # remove trailing lines until height fits
-        while total_h > box_height and len(line_images) > 1:
-            line_images.pop()
-            line_strings.pop()
-            widths = [li.width for li in line_images]
-            heights = [li.height for li in line_images]
+        while total_h > box_height and len(line_sizes) > 1:
+            line_glyphs.pop()
+            line_layouts.pop()
+            line_sizes.pop()
+            heights = [h for _, h in line_sizes]
             total_h = sum(heights) + line_spacing * (len(heights)-1 if len(heights)>0 else 0)
 
         # If still too tall (single line larger than box), try to trim that line
-        if total_h > box_height and line_images:
+        if total_h > box_height and line_sizes:
             # We'll trim characters from the last line until it fits (adding ellipsis)
-            last_idx = len(line_strings) - 1
-            base = line_strings[last_idx]
-            ell = '...'
-            # compute ellipsis image width
-            ell_img = compose_string_to_image(ell, mapping, font_dir, space_width)
-            ell_w = ell_img.width
-            # repeatedly remove characters and recompute image width
-            cur = base
-            while cur:
-                cur = cur[:-1]
-                cur_img = compose_string_to_image(cur, mapping, font_dir, space_width)
-                if cur_img.width + ell_w <= (box_width or cur_img.width + ell_w):
-                    # ok, use cur + ell
-                    new_img = compose_string_to_image(cur + ell, mapping, font_dir, space_width)
-                    line_images[last_idx] = new_img
-                    line_strings[last_idx] = cur + ell
-                    break
-            # if cur became empty and still doesn't fit, replace with ellipsis only
-            if not cur:
-                line_images[last_idx] = ell_img
-                line_strings[last_idx] = ell
-
-    # stack lines vertically
-    widths = [li.width for li in line_images]
-    heights = [li.height for li in line_images]
+            last_idx = len(line_glyphs) - 1
+            base = line_glyphs[last_idx]
+            ell = _resolve_glyphs('...', mapping)
+            # compute ellipsis width
+            _, ell_heights, ell_widths = _glyph_arrays(ell, font_dir, space_width)
+            ell_w = _line_size(ell_heights, ell_widths, space_width)[0]
+            # find the longest proper prefix that still fits next to the ellipsis
+            glyph_widths = _load_glyph_widths(mapping, font_dir, space_width)
+            prefix_w = _prefix_widths(base, glyph_widths)
+            if box_width:
+                cut = bisect_right(prefix_w, box_width - ell_w, 0, len(base)) - 1
+            else:
+                cut = len(base) - 1
+            if cut > 0:
+                line_glyphs[last_idx] = base[:cut] + ell
+            else:
+                # nothing fits alongside the ellipsis, replace with ellipsis only
+                line_glyphs[last_idx] = ell
+            line_layouts[last_idx] = _glyph_arrays(line_glyphs[last_idx], font_dir, space_width)
+            line_sizes[last_idx] = _line_size(*line_layouts[last_idx][1:], space_width)
+
+    # draw every glyph straight into the final canvas, lines centered
+    widths = [w for w, _ in line_sizes]
+    heights = [h for _, h in line_sizes]
     total_w = max(widths) if widths else 0
     total_h = sum(heights) + line_spacing * (len(heights)-1 if len(heights)>0 else 0)
-    out_img_bg = (0,0,0,0) if bg_color is None else bg_color
-    out_img = Image.new('RGBA', (total_w, total_h), out_img_bg)
+    if reuse_buffer:
+        canvas = _scratch_canvas(total_h, total_w)
+    else:
+        canvas = np.zeros((total_h, total_w, 4), dtype=np.uint8)
     y = 0
-    for li in line_images:
-        x = (total_w - li.width) // 2 if total_w > li.width else 0
-        out_img.paste(li, (x, y), li)
-        y += li.height + line_spacing
+    for glyphs, (arrays, heights, widths), (line_w, line_h) in zip(line_glyphs, line_layouts, line_sizes):
+        x0 = (total_w - line_w) // 2 if total_w > line_w else 0
+        row = _concat_line(arrays, heights, line_h) if arrays else None
+        if row is not None:
+            canvas[y:y + line_h, x0:x0 + line_w] = row
+        elif not _jit_blit_line(canvas, glyphs, font_dir, widths, x0, y + line_h):
+            for g, h, w, x in zip(arrays, heights, widths, _x_offsets(widths, x0)):
+                canvas[y + line_h - h:y + line_h, x:x + w] = g
+        y += line_h + line_spacing
+    assert canvas.flags['C_CONTIGUOUS']
+    out_img = _over_background(Image.fromarray(canvas), bg_color)
+    if bg_color is not None and bg_color[3] == 255:
+        # fully opaque, so the alpha channel carries nothing worth encoding
+        out_img = out_img.convert('RGB')
     # ensure output directory exists (handle bare filenames)
     out_dir = os.path.dirname(out_path) or '.'
     os.makedirs(out_dir, exist_ok=True)
-    out_img.save(out_path)
+    # flat glyph art compresses well even at low zlib levels
+    out_img.save(out_path, compress_level=compress_level, optimize=False)
     return out_path
 
 
+def _scratch_canvas(h, w):
+    """Return a zeroed (h, w, 4) canvas backed by a buffer reused across calls.
+
+    The buffer only grows, so repeated renders skip the allocation. The result
+    is overwritten by the next call and must be saved before then.
+    """
+    global _scratch
+    size = h * w * 4
+    if _scratch.size < size:
+        _scratch = np.empty(size, dtype=np.uint8)
+    canvas = _scratch[:size].reshape(h, w, 4)
+    canvas.fill(0)
+    return canvas
+
+
+def _init_worker(font_dir, options):
+    """Set up a batch worker process: store its options and warm the font caches."""
+    _worker_options.clear()
+    # each worker saves one image at a time, so it can keep one canvas
+    _worker_options.update(options, font_dir=font_dir, reuse_buffer=True)
+    build_mapping(font_dir)
+    _load_font(font_dir)
+
+
+def _render_one(text, out_path):
+    return generate_image(text, out_path=out_path, **_worker_options)
+
+
+def generate_batch(texts, font_dir, out_paths, workers=None, **options):
+    """Render texts[i] to out_paths[i] across worker processes.
+
+    options are passed through to generate_image. Returns the saved paths.
+    """
+    # load the font here first so forked workers inherit the decoded glyphs
+    build_mapping(font_dir)
+    _load_font(font_dir)
+    if workers == 1 or len(texts) < 2:
+        return [generate_image(t, font_dir, p, **options) for t, p in zip(texts, out_paths)]
+    # only batch runs need multiprocessing, so single renders skip its import
+    from concurrent.futures import ProcessPoolExecutor
+    # the pool forks every worker up front, so never start more than there are texts
+    workers = min(workers or os.cpu_count() or 1, len(texts))
+    chunksize = max(1, len(texts) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(font_dir, options)) as ex:
+        return list(ex.map(_render_one, texts, out_paths, chunksize=chunksize))
+
+
 def main(argv):
     parser = argparse.ArgumentParser(description='Generate PNG text using images from custom_font')
     parser.add_argument('text', nargs='*', help='Text to render (wrap in quotes). Use "\\n" for newlines. If omitted, you will be prompted.')
@@ -313,10 +673,18 @@ def main(argv):
     parser.add_argument('--box-width', type=int, default=None, help='Max pixel width of a dialogue box; text will wrap to this width')
     parser.add_argument('--box-height', type=int, default=None, help='Max pixel height of a dialogue box; text will be trimmed to this height')
     parser.add_argument('--space-width', type=int, default=10, help='Pixel width to use for space characters (word spacing)')
+    parser.add_argument('--fast', action='store_true', help='Write the PNG uncompressed (larger file, faster save)')
+    parser.add_argument('--batch', default=None, help='Text file with one dialogue line per line; each is rendered to <file stem>_NNN.png in --output (a folder) or dialogue/')
     args = parser.parse_args(argv)
+    if args.batch and args.text:
+        parser.error('--batch reads its texts from the file; drop the text arguments')
+    if args.batch and args.name:
+        parser.error('--batch names its own outputs; use --output to choose their folder')
     # Join positional text parts if provided, otherwise prompt the user
     if args.text:
         text_arg = ' '.join(args.text)
+    elif args.batch:
+        text_arg = None
     else:
         try:
             text_arg = input('Enter text to render: ')
@@ -350,6 +718,25 @@ def main(argv):
                 print(repr(k), '->', mapping[k])
         return
 
+    bg_color = parse_color(args.bg)
+    # Default dialogue box size if not provided
+    default_box_w = 143
+    default_box_h = 73
+    box_w = args.box_width if args.box_width is not None else default_box_w
+    box_h = args.box_height if args.box_height is not None else default_box_h
+    compress_level = 0 if args.fast else 1
+    options = dict(bg_color=bg_color, box_width=box_w, box_height=box_h, space_width=args.space_width, compress_level=compress_level)
+
+    if args.batch:
+        with open(args.batch, encoding='utf-8') as f:
+            texts = [line.rstrip('\r\n') for line in f if line.strip()]
+        out_dir = args.output or os.path.join(repo_root, 'dialogue')
+        stem = os.path.splitext(os.path.basename(args.batch))[0]
+        outs = [os.path.join(out_dir, f'{stem}_{i:03d}.png') for i in range(len(texts))]
+        for out_path in generate_batch(texts, font_dir, outs, **options):
+            print('Saved:', out_path)
+        return
+
     # Determine output path: --output > --name > timestamp default
     if args.output:
         out = args.output
@@ -358,13 +745,7 @@ def main(argv):
     else:
         ts = datetime.now().strftime('%Y%m%d_%H%M%S')
         out = os.path.join(repo_root, 'dialogue', f'dialogue_{ts}.png')
-    bg_color = parse_color(args.bg)
-    # Default dialogue box size if not provided
-    default_box_w = 143
-    default_box_h = 73
-    box_w = args.box_width if args.box_width is not None else default_box_w
-    box_h = args.box_height if args.box_height is not None else default_box_h
-    out_path = generate_image(text_arg, font_dir, out, bg_color=bg_color, box_width=box_w, box_height=box_h, space_width=args.space_width)
+    out_path = generate_image(text_arg, font_dir, out, **options)
     print('Saved:', out_path)
 
 if __name__ == '__main__':